@@ -0,0 +1,583 @@
+#!/usr/bin/env python3
+"""
+ARG Answer Index - Precompute puzzle solutions and validate player guesses.
+
+Usage:
+    python answer_index.py build <puzzles.json> <index.json>
+    python answer_index.py check <index.json> <puzzle_id> <guess>
+    python answer_index.py serve <index.json> [--host HOST] [--port PORT] [--rate N] [--burst N] [--workers N]
+    python answer_index.py bench <puzzle_id> <guess> [--host HOST] [--port PORT] [--requests N]
+                                 [--connections N] [--pipeline N] [--workers N]
+
+Puzzle file format:
+    {"puzzles": [
+        {"id": "stage1",
+         "ciphertext": "Wkh grru lv rshq",
+         "chain": [{"cipher": "caesar", "key": 3}],
+         "accept": ["door open"]}
+    ]}
+
+The chain is applied in order using the decoders from cipher_tools.CIPHERS.
+The decoded plaintext and every "accept" variant are normalized (uppercase,
+letters and digits only) and stored as salted SHA-256 hashes, so the index
+file does not reveal answers and each guess is a single set lookup.
+
+Server endpoints:
+    GET  /check?puzzle=<id>&guess=<text>
+    POST /check   {"puzzle": "<id>", "guess": "<text>"}
+Responses are JSON: {"puzzle": "<id>", "correct": true|false}
+Bodies over 4 KiB get 413; clients over the per-IP rate limit get 429.
+HTTP/1.1 connections are kept alive (and may pipeline); HTTP/1.0 ones only
+with "Connection: keep-alive".
+
+Benchmarking:
+    bench sends every request from one IP, so the default serve limits
+    (5/s, burst 20) answer nearly all of them with 429. Raise the limits:
+        python answer_index.py serve index.json --rate 1e9 --burst 1000000
+        python answer_index.py bench stage1 "door open" -n 20000 -c 50
+    One server process handled 20-27k checks/s on a single core shared
+    with bench (-n 20003 -c 50), and ~33k/s with --pipeline 8. On multi-core
+    hosts, serve --workers N runs N processes on the same port via
+    SO_REUSEPORT; give bench --workers too so the client is not the limit.
+    Rate-limit buckets are per worker process.
+"""
+
+import argparse
+import asyncio
+import functools
+import hashlib
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import time
+from urllib.parse import parse_qs, urlsplit
+
+from cipher_tools import CIPHERS, _default_key
+
+
+def normalize_answer(text: str) -> str:
+    """Normalize an answer: uppercase, letters and digits only."""
+    return ''.join(c for c in text.upper() if c.isalnum())
+
+
+def hash_answer(salt: str, puzzle_id: str, answer: str) -> str:
+    """Salted hash of a normalized answer."""
+    data = f"{salt}:{puzzle_id}:{normalize_answer(answer)}".encode('utf-8')
+    return hashlib.sha256(data).hexdigest()
+
+
+def decode_chain(ciphertext: str, chain: list) -> str:
+    """Apply a chain of CIPHERS decoders in order."""
+    text = ciphertext
+    for step in chain:
+        name = step['cipher']
+        if name not in CIPHERS:
+            raise ValueError(f"Unknown cipher: {name}")
+        decode = CIPHERS[name]['decode']
+        key = _default_key(name, step.get('key'))
+        text = decode(text, key) if key is not None else decode(text)
+    return text
+
+
+def build_index(puzzles_path: str, index_path: str):
+    """Decode every puzzle and write the hashed answer index."""
+    with open(puzzles_path, encoding='utf-8') as f:
+        spec = json.load(f)
+    puzzles = spec['puzzles'] if isinstance(spec, dict) and 'puzzles' in spec else spec
+    if isinstance(puzzles, dict):
+        puzzles = [puzzles]
+
+    salt = os.urandom(16).hex()
+    index = {'salt': salt, 'puzzles': {}}
+    for puzzle in puzzles:
+        puzzle_id = puzzle['id']
+        answers = [decode_chain(puzzle['ciphertext'], puzzle.get('chain', []))]
+        answers.extend(puzzle.get('accept', []))
+        hashes = sorted({hash_answer(salt, puzzle_id, a) for a in answers if normalize_answer(a)})
+        index['puzzles'][puzzle_id] = hashes
+        print(f"  {puzzle_id}: {len(hashes)} accepted answer(s)")
+
+    with open(index_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2)
+    print(f"Wrote index for {len(index['puzzles'])} puzzle(s) to {index_path}")
+
+
+class AnswerIndex:
+    """In-memory answer index with O(1) guess checks."""
+
+    def __init__(self, salt: str, puzzles: dict):
+        self.salt = salt
+        self.puzzles = {pid: frozenset(hashes) for pid, hashes in puzzles.items()}
+
+    @classmethod
+    def load(cls, index_path: str) -> 'AnswerIndex':
+        with open(index_path, encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['salt'], data['puzzles'])
+
+    def check(self, puzzle_id: str, guess: str) -> bool:
+        """Return True if guess is an accepted answer for puzzle_id."""
+        hashes = self.puzzles.get(puzzle_id)
+        if hashes is None:
+            raise KeyError(puzzle_id)
+        return hash_answer(self.salt, puzzle_id, guess) in hashes
+
+
+class RateLimiter:
+    """Per-client token bucket: `rate` requests/second, bursts up to `burst`."""
+
+    def __init__(self, rate: float, burst: int, max_clients: int = 100000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self.prune_at = max_clients
+        self.buckets = {}
+
+    def _prune(self, now: float):
+        """Forget clients whose buckets have fully refilled.
+
+        The next prune waits until the table doubles, so the O(n) pass stays
+        amortized O(1) per request even when every client is still active.
+        """
+        idle = self.burst / self.rate
+        self.buckets = {c: b for c, b in self.buckets.items() if now - b[1] < idle}
+        self.prune_at = max(self.max_clients, 2 * len(self.buckets))
+
+    def allow(self, client: str) -> bool:
+        now = time.monotonic()
+        if len(self.buckets) > self.prune_at:
+            self._prune(now)
+        tokens, last = self.buckets.get(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - last) * self.rate)
+        if tokens < 1:
+            self.buckets[client] = (tokens, now)
+            return False
+        self.buckets[client] = (tokens - 1, now)
+        return True
+
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found',
+               405: 'Method Not Allowed', 413: 'Payload Too Large',
+               429: 'Too Many Requests', 431: 'Request Header Fields Too Large'}
+
+MAX_BODY = 4096            # Bytes; a guess submission is a few dozen
+MAX_HEADERS = 100
+MAX_HEADER_BYTES = 16384   # Request line plus headers
+
+
+def _response(status: int, body: dict, keep_alive: bool) -> bytes:
+    payload = json.dumps(body).encode('utf-8')
+    headers = (
+        f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(payload)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return headers.encode('ascii') + payload
+
+
+@functools.lru_cache(maxsize=4096)
+def _check_response(puzzle_id: str, correct: bool, keep_alive: bool) -> bytes:
+    """Encoded 200 reply. Only known puzzle IDs get here, so the cache stays small."""
+    return _response(200, {'puzzle': puzzle_id, 'correct': correct}, keep_alive)
+
+
+@functools.lru_cache(maxsize=256)
+def _error_response(status: int, message: str, keep_alive: bool) -> bytes:
+    return _response(status, {'error': message}, keep_alive)
+
+
+def handle_request(index: AnswerIndex, method: str, target: str, body: bytes):
+    """Route a single request. Returns (status, response body)."""
+    url = urlsplit(target)
+    if url.path != '/check':
+        return 404, {'error': 'not found'}
+    if method == 'GET':
+        query = parse_qs(url.query)
+        puzzle_id = query.get('puzzle', [None])[0]
+        guess = query.get('guess', [None])[0]
+    elif method == 'POST':
+        try:
+            data = json.loads(body or b'{}')
+        except ValueError:
+            return 400, {'error': 'invalid JSON'}
+        if not isinstance(data, dict):
+            return 400, {'error': 'expected a JSON object'}
+        puzzle_id = data.get('puzzle')
+        guess = data.get('guess')
+    else:
+        return 405, {'error': 'method not allowed'}
+
+    if not isinstance(puzzle_id, str) or not puzzle_id or not isinstance(guess, str):
+        return 400, {'error': "'puzzle' and 'guess' are required"}
+    try:
+        correct = index.check(puzzle_id, guess)
+    except KeyError:
+        return 404, {'error': f'unknown puzzle: {puzzle_id}'}
+    return 200, {'puzzle': puzzle_id, 'correct': correct}
+
+
+class CheckProtocol(asyncio.Protocol):
+    """HTTP/1.1 keep-alive connection serving /check.
+
+    Requests are parsed straight out of the receive buffer (pipelining
+    works), with no coroutine or readline() call per header line.
+    """
+
+    def __init__(self, index: AnswerIndex, limiter: RateLimiter):
+        self.index = index
+        self.limiter = limiter
+        self.buffer = bytearray()
+        self.pending = None   # Parsed head waiting for its body
+        self.closing = False
+
+    def connection_made(self, transport):
+        self.transport = transport
+        peer = transport.get_extra_info('peername')
+        self.client = peer[0] if peer else ''
+
+    def data_received(self, data: bytes):
+        if self.closing:
+            return
+        self.buffer += data
+        while not self.closing and self._next_request():
+            pass
+
+    # Stop reading while the client is not reading our replies
+    def pause_writing(self):
+        self.transport.pause_reading()
+
+    def resume_writing(self):
+        self.transport.resume_reading()
+
+    def _reply(self, response: bytes, keep_alive: bool):
+        self.transport.write(response)
+        if not keep_alive:
+            self.closing = True
+            self.transport.close()
+
+    def _fail(self, status: int, message: str):
+        self._reply(_error_response(status, message, False), False)
+
+    def _next_request(self) -> bool:
+        """Handle one buffered request. Returns False when more data is needed."""
+        if self.pending is None:
+            end = self.buffer.find(b'\r\n\r\n')
+            if end < 0:
+                if len(self.buffer) > MAX_HEADER_BYTES:
+                    self._fail(431, 'request headers too large')
+                return False
+            if end > MAX_HEADER_BYTES:
+                self._fail(431, 'request headers too large')
+                return False
+            lines = self.buffer[:end].decode('latin-1').split('\r\n')
+            del self.buffer[:end + 4]
+
+            parts = lines[0].split()
+            if len(parts) != 3:
+                self._fail(400, 'bad request')
+                return False
+            if len(lines) - 1 > MAX_HEADERS:
+                self._fail(431, 'too many headers')
+                return False
+            headers = {}
+            for line in lines[1:]:
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            try:
+                length = int(headers.get('content-length', 0) or 0)
+            except ValueError:
+                self._fail(400, 'invalid Content-Length')
+                return False
+            # Oversized bodies are rejected before they are read
+            if length < 0 or length > MAX_BODY:
+                self._fail(413, f'body exceeds {MAX_BODY} bytes')
+                return False
+
+            connection = headers.get('connection', '').lower()
+            if parts[2] == 'HTTP/1.0':
+                keep_alive = connection == 'keep-alive'
+            else:
+                keep_alive = connection != 'close'
+            # Rate limit is decided before the body is read
+            allowed = self.limiter.allow(self.client)
+            self.pending = (parts[0], parts[1], length, keep_alive, allowed)
+
+        method, target, length, keep_alive, allowed = self.pending
+        if len(self.buffer) < length:
+            return False
+        body = bytes(self.buffer[:length])
+        del self.buffer[:length]
+        self.pending = None
+
+        if not allowed:
+            # A rate-limited body is at most MAX_BODY and is discarded
+            self._reply(_error_response(429, 'rate limit exceeded', keep_alive), keep_alive)
+            return True
+        status, payload = handle_request(self.index, method, target, body)
+        if status == 200:
+            response = _check_response(payload['puzzle'], payload['correct'], keep_alive)
+        else:
+            response = _response(status, payload, keep_alive)
+        self._reply(response, keep_alive)
+        return True
+
+
+async def _serve(index: AnswerIndex, host: str, port: int, rate: float, burst: int,
+                 reuse_port: bool = False, announce: bool = True):
+    limiter = RateLimiter(rate, burst)
+    loop = asyncio.get_running_loop()
+    server = await loop.create_server(
+        lambda: CheckProtocol(index, limiter), host, port, reuse_port=reuse_port or None)
+    if announce:
+        print(f"Serving {len(index.puzzles)} puzzle(s) on http://{host}:{port}/check")
+        print(f"Rate limit: {rate}/s per IP (burst {burst})")
+    async with server:
+        await server.serve_forever()
+
+
+def _serve_worker(index: AnswerIndex, host: str, port: int, rate: float, burst: int):
+    try:
+        asyncio.run(_serve(index, host, port, rate, burst, reuse_port=True, announce=False))
+    except KeyboardInterrupt:
+        pass
+
+
+def serve(index_path: str, host: str = '127.0.0.1', port: int = 8080,
+          rate: float = 5.0, burst: int = 20, workers: int = 1):
+    """Serve guess checks over HTTP until interrupted.
+
+    With workers > 1, each worker process binds the port with SO_REUSEPORT
+    and the kernel spreads connections across them. Rate-limit buckets are
+    per process, so one IP whose connections land on several workers can
+    get up to workers x rate.
+    """
+    index = AnswerIndex.load(index_path)
+    if workers <= 1:
+        try:
+            asyncio.run(_serve(index, host, port, rate, burst))
+        except KeyboardInterrupt:
+            print("\nStopped")
+        return
+
+    if not hasattr(socket, 'SO_REUSEPORT'):
+        print("Error: --workers needs SO_REUSEPORT (Linux, macOS, BSD)")
+        sys.exit(1)
+    procs = [multiprocessing.Process(target=_serve_worker, args=(index, host, port, rate, burst))
+             for _ in range(workers)]
+    for proc in procs:
+        proc.start()
+    print(f"Serving {len(index.puzzles)} puzzle(s) on http://{host}:{port}/check "
+          f"with {workers} workers")
+    print(f"Rate limit: {rate}/s per IP per worker (burst {burst})")
+    try:
+        for proc in procs:
+            proc.join()
+    except KeyboardInterrupt:
+        for proc in procs:
+            proc.terminate()
+        print("\nStopped")
+
+
+class _BenchProtocol(asyncio.Protocol):
+    """Stub client connection: sends `count` requests, `pipeline` in flight."""
+
+    def __init__(self, request: bytes, count: int, pipeline: int, statuses: dict, done):
+        self.request = request
+        self.remaining = count      # Not yet sent
+        self.in_flight = 0
+        self.pipeline = pipeline
+        self.statuses = statuses
+        self.done = done
+        self.buffer = bytearray()
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self._send(self.pipeline)
+
+    def _send(self, n: int):
+        n = min(n, self.remaining)
+        if n:
+            self.transport.write(self.request * n)
+            self.remaining -= n
+            self.in_flight += n
+
+    def data_received(self, data: bytes):
+        self.buffer += data
+        replies = 0
+        while True:
+            end = self.buffer.find(b'\r\n\r\n')
+            if end < 0:
+                break
+            head = self.buffer[:end].decode('latin-1').split('\r\n')
+            length = 0
+            for line in head[1:]:
+                name, _, value = line.partition(':')
+                if name.strip().lower() == 'content-length':
+                    length = int(value)
+            if len(self.buffer) < end + 4 + length:
+                break
+            del self.buffer[:end + 4 + length]
+            status = int(head[0].split()[1])
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            self.in_flight -= 1
+            replies += 1
+        self._send(replies)
+        if not self.remaining and not self.in_flight:
+            self.transport.close()
+
+    def connection_lost(self, exc):
+        unsent = self.remaining + self.in_flight
+        if unsent:
+            self.statuses['closed'] = self.statuses.get('closed', 0) + unsent
+        if not self.done.done():
+            self.done.set_result(None)
+
+
+async def _bench_connection(host: str, port: int, request: bytes, count: int,
+                            pipeline: int, statuses: dict):
+    loop = asyncio.get_running_loop()
+    done = loop.create_future()
+    try:
+        await loop.create_connection(
+            lambda: _BenchProtocol(request, count, pipeline, statuses, done), host, port)
+    except OSError:
+        statuses['refused'] = statuses.get('refused', 0) + count
+        return
+    await done
+
+
+def _bench_process(host: str, port: int, request: bytes, counts: list, pipeline: int) -> dict:
+    statuses = {}
+
+    async def run():
+        await asyncio.gather(*(
+            _bench_connection(host, port, request, count, pipeline, statuses)
+            for count in counts))
+
+    asyncio.run(run())
+    return statuses
+
+
+def _split(total: int, parts: int) -> list:
+    """Split total into `parts` near-equal counts that sum exactly to total."""
+    base, extra = divmod(total, parts)
+    return [base + (1 if i < extra else 0) for i in range(parts)]
+
+
+def bench(puzzle_id: str, guess: str, host: str = '127.0.0.1', port: int = 8080,
+          requests: int = 10000, connections: int = 50, pipeline: int = 1,
+          workers: int = 1):
+    """Stub client: send many keep-alive checks and report throughput."""
+    body = json.dumps({'puzzle': puzzle_id, 'guess': guess}).encode('utf-8')
+    request = (
+        f"POST /check HTTP/1.1\r\nHost: {host}\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+    ).encode('ascii') + body
+
+    connections = max(1, min(connections, requests))
+    workers = max(1, min(workers, connections))
+    counts = _split(requests, connections)
+    # Connection i goes to worker i % workers
+    shares = [counts[w::workers] for w in range(workers)]
+
+    start = time.perf_counter()
+    if workers == 1:
+        results = [_bench_process(host, port, request, shares[0], pipeline)]
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            results = pool.starmap(_bench_process,
+                                   [(host, port, request, share, pipeline) for share in shares])
+    elapsed = time.perf_counter() - start
+
+    statuses = {}
+    for result in results:
+        for status, n in result.items():
+            statuses[status] = statuses.get(status, 0) + n
+    if statuses.get('refused') == requests:
+        print(f"Error: could not connect to {host}:{port}")
+        sys.exit(1)
+
+    total = sum(n for status, n in statuses.items() if isinstance(status, int))
+    print(f"Sent {total} requests over {connections} connections in {elapsed:.2f}s")
+    print(f"Throughput: {total / elapsed:.0f} checks/s")
+    for status, n in sorted(statuses.items(), key=str):
+        if status == 'closed':
+            print(f"  Unsent (connection closed): {n}")
+        elif status == 'refused':
+            print(f"  Unsent (connection refused): {n}")
+        else:
+            print(f"  HTTP {status}: {n}")
+    if statuses.get(429):
+        print("Note: all bench traffic comes from one IP. Start the server with a")
+        print("higher limit to measure throughput, e.g. serve --rate 1e9 --burst 1000000")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ARG Answer Index')
+    subparsers = parser.add_subparsers(dest='command', help='Command')
+
+    # Build index
+    build = subparsers.add_parser('build', help='Precompute hashed answer index')
+    build.add_argument('puzzles', help='Puzzle definition JSON file')
+    build.add_argument('index', help='Output index JSON file')
+
+    # Check one guess locally
+    check = subparsers.add_parser('check', help='Check a guess against the index')
+    check.add_argument('index', help='Index JSON file')
+    check.add_argument('puzzle', help='Puzzle ID')
+    check.add_argument('guess', help='Player guess')
+
+    # Serve
+    srv = subparsers.add_parser('serve', help='Serve guess checks over HTTP')
+    srv.add_argument('index', help='Index JSON file')
+    srv.add_argument('--host', default='127.0.0.1', help='Bind address (default: 127.0.0.1)')
+    srv.add_argument('--port', '-p', type=int, default=8080, help='Port (default: 8080)')
+    srv.add_argument('--rate', type=float, default=5.0, help='Requests/second per IP (default: 5)')
+    srv.add_argument('--burst', type=int, default=20, help='Burst size per IP (default: 20)')
+    srv.add_argument('--workers', '-w', type=int, default=1,
+                     help='Worker processes sharing the port via SO_REUSEPORT (default: 1)')
+
+    # Stub client / load test
+    bch = subparsers.add_parser('bench', help='Load-test a running server')
+    bch.add_argument('puzzle', help='Puzzle ID')
+    bch.add_argument('guess', help='Guess to submit')
+    bch.add_argument('--host', default='127.0.0.1', help='Server address (default: 127.0.0.1)')
+    bch.add_argument('--port', '-p', type=int, default=8080, help='Port (default: 8080)')
+    bch.add_argument('--requests', '-n', type=int, default=10000, help='Total requests (default: 10000)')
+    bch.add_argument('--connections', '-c', type=int, default=50, help='Concurrent connections (default: 50)')
+    bch.add_argument('--pipeline', type=int, default=1,
+                     help='Requests in flight per connection (default: 1)')
+    bch.add_argument('--workers', '-w', type=int, default=1,
+                     help='Client processes (default: 1)')
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        try:
+            build_index(args.puzzles, args.index)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+    elif args.command == 'check':
+        index = AnswerIndex.load(args.index)
+        try:
+            correct = index.check(args.puzzle, args.guess)
+        except KeyError:
+            print(f"Unknown puzzle: {args.puzzle}")
+            sys.exit(1)
+        print("Correct!" if correct else "Incorrect")
+    elif args.command == 'serve':
+        serve(args.index, args.host, args.port, args.rate, args.burst, args.workers)
+    elif args.command == 'bench':
+        bench(args.puzzle, args.guess, args.host, args.port, args.requests,
+              args.connections, args.pipeline, args.workers)
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
@@ -5,15 +5,27 @@ ARG Cipher Tools - Encode and decode common ciphers used in ARGs.
 Usage:
     python cipher_tools.py encode <cipher> <text> [--key KEY]
     python cipher_tools.py decode <cipher> <text> [--key KEY]
+    python cipher_tools.py encode-many <cipher> <input.csv|input.jsonl> [--output FILE]
+    python cipher_tools.py decode-many <cipher> <input.csv|input.jsonl> [--output FILE]
     python cipher_tools.py list
 
 Supported ciphers:
     caesar, rot13, atbash, vigenere, railfence, base64, morse, binary, hex
+
+Batch mode (encode-many/decode-many) reads rows with 'text' and 'key' fields
+and writes them back with a 'result' field. Caesar, ROT13, Atbash and Vigenère
+are applied in a single vectorized pass.
+
+Requirements (batch mode only):
+    pip install numpy
 """
 
 import argparse
 import base64
+import csv
+import json
 import string
+import sys
 
 # Morse code dictionary
 MORSE_CODE = {
@@ -204,6 +216,178 @@ CIPHERS = {
 }
 
 
+VECTORIZED_CIPHERS = ('caesar', 'rot13', 'atbash', 'vigenere')
+
+
+def _default_key(cipher: str, key):
+    """Resolve a batch key the same way the single-message CLI does."""
+    key_type = CIPHERS[cipher]['key_type']
+    if key_type == 'int':
+        return int(key) if key not in (None, '') else 3
+    if key_type == 'str':
+        if key is None or key == '':
+            raise ValueError(f"{cipher} cipher requires a key")
+        if not isinstance(key, str):
+            raise ValueError(f"{cipher} key must be a string, got {type(key).__name__}")
+        return key
+    return None
+
+
+def _transform_many(cipher: str, pairs, decode: bool) -> list:
+    """Apply a cipher to many (text, key) pairs, vectorizing where possible."""
+    if cipher not in CIPHERS:
+        raise ValueError(f"Unknown cipher: {cipher}")
+    pairs = list(pairs)
+    if not pairs:
+        return []
+    texts = [text for text, _ in pairs]
+    keys = [key for _, key in pairs]
+
+    func = CIPHERS[cipher]['decode' if decode else 'encode']
+    key_type = CIPHERS[cipher]['key_type']
+    if cipher not in VECTORIZED_CIPHERS:
+        if key_type:
+            return [func(text, _default_key(cipher, key)) for text, key in zip(texts, keys)]
+        return [func(text) for text in texts]
+
+    try:
+        import numpy as np
+    except ImportError:
+        print("Error: Requires 'numpy'. Install with: pip install numpy")
+        sys.exit(1)
+
+    # Every message is followed by a NUL separator, so each one occupies at
+    # least one byte and the result can be split back apart in one call.
+    joined = '\x00'.join(texts) + '\x00'
+    if not joined.isascii():
+        # Non-ASCII letters follow str.isalpha() quirks in the scalar
+        # functions, so those messages take the per-message path.
+        results = [None] * len(texts)
+        ascii_indices = []
+        for i, text in enumerate(texts):
+            if text.isascii():
+                ascii_indices.append(i)
+            elif key_type:
+                results[i] = func(text, _default_key(cipher, keys[i]))
+            else:
+                results[i] = func(text)
+        ascii_results = _transform_many(
+            cipher, [(texts[i], keys[i]) for i in ascii_indices], decode)
+        for i, result in zip(ascii_indices, ascii_results):
+            results[i] = result
+        return results
+
+    n = len(texts)
+    lengths = np.fromiter(map(len, texts), dtype=np.int32, count=n) + 1
+    buf = np.frombuffer(joined.encode('ascii'), dtype=np.uint8)
+
+    # Letter index 0-25 for both cases; anything else wraps to >= 26
+    idx = (buf | 0x20) - np.uint8(ord('a'))
+    alpha = idx < 26
+
+    if cipher == 'atbash':
+        shifted = 25 - idx
+    else:
+        if cipher == 'rot13':
+            shifts = np.uint8(13)
+        elif cipher == 'caesar':
+            try:
+                int_keys = np.fromiter(keys, dtype=np.int64, count=n)
+            except (TypeError, ValueError):
+                int_keys = np.fromiter((_default_key(cipher, k) for k in keys), dtype=np.int64, count=n)
+            shifts = np.repeat((int_keys % 26).astype(np.uint8), lengths)
+        else:
+            # Vigenère: the key only advances on letters, per message
+            try:
+                key_str = ''.join(keys)
+            except TypeError:
+                keys = [_default_key(cipher, k) for k in keys]
+                key_str = ''.join(keys)
+            if key_str.isascii():
+                key_buf = np.frombuffer(key_str.upper().encode('ascii'), dtype=np.uint8)
+            else:
+                # str.upper() can change length outside ASCII (e.g. 'ß')
+                keys = [k.upper() for k in keys]
+                key_buf = np.frombuffer(''.join(keys).encode('utf-32-le'), dtype=np.uint32)
+            key_buf = ((key_buf.astype(np.int64) - ord('A')) % 26).astype(np.uint8)
+            key_lengths = np.fromiter(map(len, keys), dtype=np.int32, count=n)
+            if key_lengths.min() == 0:
+                raise ValueError(f"{cipher} cipher requires a key")
+            key_offsets = np.zeros(n, dtype=np.int32)
+            np.cumsum(key_lengths[:-1], out=key_offsets[1:])
+
+            # Letters seen before each message: the cumulative count at the
+            # separator that ends the previous message.
+            key_index = np.cumsum(alpha, dtype=np.int32)
+            ends = np.cumsum(lengths) - 1
+            letters_before = np.empty(n, dtype=np.int32)
+            letters_before[0] = 1
+            letters_before[1:] = key_index[ends[:-1]] + 1
+            key_index -= np.repeat(letters_before, lengths)
+            key_index %= np.repeat(key_lengths, lengths)
+            key_index += np.repeat(key_offsets, lengths)
+            shifts = key_buf[key_index]
+        if decode and cipher != 'rot13':
+            shifts = 26 - shifts
+        shifted = (idx + shifts) % 26
+    out = np.where(alpha, buf - idx + shifted, buf).tobytes().decode('ascii')
+
+    if joined.count('\x00') == n:
+        return out.split('\x00')[:-1]
+    # Messages contain NULs themselves: cut at the known offsets instead
+    bounds = np.concatenate(([0], np.cumsum(lengths))).tolist()
+    return [out[bounds[j]:bounds[j + 1] - 1] for j in range(n)]
+
+
+def encode_many(cipher: str, pairs) -> list:
+    """Encode many (text, key) pairs with one cipher. Key is ignored if unused."""
+    return _transform_many(cipher, pairs, decode=False)
+
+
+def decode_many(cipher: str, pairs) -> list:
+    """Decode many (text, key) pairs with one cipher. Key is ignored if unused."""
+    return _transform_many(cipher, pairs, decode=True)
+
+
+def _read_rows(path: str, fmt: str) -> list:
+    """Read batch rows from a CSV (header: text,key) or JSONL file."""
+    with open(path, newline='', encoding='utf-8') as f:
+        if fmt == 'jsonl':
+            return [json.loads(line) for line in f if line.strip()]
+        return list(csv.DictReader(f))
+
+
+def _write_rows(rows: list, out, fmt: str):
+    """Write batch rows as CSV or JSONL."""
+    if fmt == 'jsonl':
+        for row in rows:
+            out.write(json.dumps(row, ensure_ascii=False) + '\n')
+        return
+    fieldnames = list(rows[0].keys()) if rows else ['text', 'key', 'result']
+    writer = csv.DictWriter(out, fieldnames=fieldnames)
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+def run_many(command: str, cipher: str, input_path: str, output_path: str = None,
+             fmt: str = None):
+    """CLI front end for encode-many/decode-many."""
+    if fmt is None:
+        fmt = 'jsonl' if input_path.endswith(('.jsonl', '.ndjson')) else 'csv'
+    rows = _read_rows(input_path, fmt)
+    pairs = [(row.get('text', ''), row.get('key')) for row in rows]
+    func = encode_many if command == 'encode-many' else decode_many
+    for row, result in zip(rows, func(cipher, pairs)):
+        row['result'] = result
+
+    if output_path:
+        with open(output_path, 'w', newline='', encoding='utf-8') as f:
+            _write_rows(rows, f, fmt)
+        print(f"Wrote {len(rows)} rows to {output_path}")
+    else:
+        _write_rows(rows, sys.stdout, fmt)
+
+
 def main():
     parser = argparse.ArgumentParser(description='ARG Cipher Tools')
     subparsers = parser.add_subparsers(dest='command', help='Command')
@@ -220,11 +404,27 @@ def main():
     decode_parser.add_argument('text', help='Text to decode')
     decode_parser.add_argument('--key', '-k', help='Key (for ciphers that require one)')
 
+    # Batch commands
+    for name, verb in (('encode-many', 'Encode'), ('decode-many', 'Decode')):
+        many_parser = subparsers.add_parser(name, help=f'{verb} many messages from CSV/JSONL')
+        many_parser.add_argument('cipher', choices=CIPHERS.keys(), help='Cipher to use')
+        many_parser.add_argument('input', help="CSV or JSONL file with 'text' and 'key' fields")
+        many_parser.add_argument('--output', '-o', help='Output file (default: stdout)')
+        many_parser.add_argument('--format', '-f', choices=['csv', 'jsonl'],
+                                 help='Input/output format (default: from extension)')
+
     # List command
     subparsers.add_parser('list', help='List available ciphers')
 
     args = parser.parse_args()
 
+    if args.command in ('encode-many', 'decode-many'):
+        try:
+            run_many(args.command, args.cipher, args.input, args.output, args.format)
+        except ValueError as e:
+            print(f"Error: {e}")
+        return
+
     if args.command == 'list':
         print("Available ciphers:")
         for name, info in CIPHERS.items():
@@ -5,6 +5,7 @@ ARG Spectrogram Tools - Create and analyze audio spectrograms.
 Usage:
     python spectrogram.py image-to-audio <image> <output.wav> [--duration SECONDS]
     python spectrogram.py text-to-audio <text> <output.wav> [--duration SECONDS]
+    python spectrogram.py text-batch <texts.txt|texts.csv> <output_dir> [--duration SECONDS]
     python spectrogram.py view <audio_file> [--output IMAGE]
 
 Requirements:
@@ -12,113 +13,242 @@ Requirements:
 """
 
 import argparse
+import csv
+import math
+import os
 import sys
 
 
-def image_to_spectrogram_audio(image_path: str, output_path: str, duration: float = 5.0):
-    """Convert image to audio that displays the image as a spectrogram."""
-    try:
-        from PIL import Image
+# Spectrogram canvas and audio parameters
+WIDTH = 800
+HEIGHT = 256  # Frequency bins
+SAMPLE_RATE = 44100
+MIN_FREQ = 200
+MAX_FREQ = 8000
+
+FONT_PATHS = [
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+    "/System/Library/Fonts/Helvetica.ttc",
+]
+
+_glyph_atlases = {}
+_sine_tables = {}
+
+
+class GlyphAtlas:
+    """Font loaded once, with each glyph rasterized once to a NumPy mask."""
+
+    def __init__(self, font_path: str = None, size: int = 72):
+        try:
+            from PIL import ImageFont
+        except ImportError:
+            print("Error: Requires 'pillow', 'numpy'. Install with: pip install pillow numpy")
+            sys.exit(1)
+
+        self.font = None
+        for path in ([font_path] if font_path else FONT_PATHS):
+            try:
+                self.font = ImageFont.truetype(path, size)
+                break
+            except OSError:
+                continue
+        if self.font is None:
+            if font_path:
+                print(f"Warning: Could not load font {font_path}, using default")
+            self.font = ImageFont.load_default()
+        self.glyphs = {}
+        self.kerns = {}
+
+    def glyph(self, char: str):
+        """Return (mask, x_offset, y_offset, advance) for a character."""
+        if char not in self.glyphs:
+            from PIL import Image, ImageDraw
+            import numpy as np
+
+            left, top, right, bottom = self.font.getbbox(char)
+            img = Image.new('L', (max(right - left, 1), max(bottom - top, 1)), 0)
+            ImageDraw.Draw(img).text((-left, -top), char, fill=255, font=self.font)
+            self.glyphs[char] = (np.array(img), left, top, self.font.getlength(char))
+        return self.glyphs[char]
+
+    def kerning(self, left: str, right: str) -> float:
+        """Kerning adjustment between two characters (cached per pair)."""
+        pair = left + right
+        if pair not in self.kerns:
+            self.kerns[pair] = (self.font.getlength(pair)
+                                - self.font.getlength(left) - self.font.getlength(right))
+        return self.kerns[pair]
+
+    def render(self, text: str, width: int = WIDTH, height: int = HEIGHT):
+        """Rasterize text centered on a width x height uint8 array."""
         import numpy as np
-        from scipy.io import wavfile
-    except ImportError:
-        print("Error: Requires 'pillow', 'numpy', 'scipy'. Install with:")
-        print("  pip install pillow numpy scipy")
-        sys.exit(1)
 
-    # Load and prepare image
-    img = Image.open(image_path).convert('L')  # Grayscale
+        if '\n' in text:
+            return self._render_multiline(text, width, height)
+
+        canvas = np.zeros((height, width), dtype=np.uint8)
+        placed = []
+        pen = 0.0
+        prev = None
+        for char in text:
+            mask, left, top, advance = self.glyph(char)
+            if prev is not None:
+                pen += self.kerning(prev, char)
+            if mask.any():
+                placed.append((mask, math.floor(pen + 0.5) + left, top))
+            pen += advance
+            prev = char
+
+        # Center on the same box ImageDraw.textbbox measures (a layout query,
+        # no rasterization), so leading/trailing space advances still count
+        left, top, right, bottom = self.font.getbbox(text)
+        origin_x = (width - (right - left)) // 2
+        origin_y = (height - (bottom - top)) // 2
+
+        for mask, x, y in placed:
+            x0, y0 = origin_x + x, origin_y + y
+            x1, y1 = x0 + mask.shape[1], y0 + mask.shape[0]
+            cx0, cy0, cx1, cy1 = max(x0, 0), max(y0, 0), min(x1, width), min(y1, height)
+            if cx0 >= cx1 or cy0 >= cy1:
+                continue
+            # Overlapping glyph edges blend "over" each other, as Pillow does
+            region = canvas[cy0:cy1, cx0:cx1]
+            src = mask[cy0 - y0:cy1 - y0, cx0 - x0:cx1 - x0].astype(np.uint32)
+            blend = region * (255 - src) + 128
+            region[...] = src + ((blend + (blend >> 8)) >> 8)
+        return canvas
+
+    def _render_multiline(self, text: str, width: int, height: int):
+        """Draw multi-line text with ImageDraw so line layout matches Pillow."""
+        from PIL import Image, ImageDraw
+        import numpy as np
 
-    # Resize to reasonable spectrogram dimensions
-    width = 800
-    height = 256  # Frequency bins
-    img = img.resize((width, height))
+        img = Image.new('L', (width, height), 0)
+        draw = ImageDraw.Draw(img)
+        bbox = draw.textbbox((0, 0), text, font=self.font)
+        x = (width - (bbox[2] - bbox[0])) // 2
+        y = (height - (bbox[3] - bbox[1])) // 2
+        draw.text((x, y), text, fill=255, font=self.font)
+        return np.array(img)
 
-    # Convert to numpy array (flip vertically so low frequencies are at bottom)
-    pixels = np.array(img)
-    pixels = np.flipud(pixels)
 
-    # Normalize to 0-1
-    pixels = pixels / 255.0
+def get_glyph_atlas(font_path: str = None, size: int = 72) -> GlyphAtlas:
+    """Return a cached GlyphAtlas for the font, loading it on first use."""
+    key = (font_path, size)
+    if key not in _glyph_atlases:
+        _glyph_atlases[key] = GlyphAtlas(font_path, size)
+    return _glyph_atlases[key]
 
-    # Audio parameters
-    sample_rate = 44100
-    num_samples = int(duration * sample_rate)
-    samples_per_column = num_samples // width
 
-    # Frequency range (Hz)
-    min_freq = 200
-    max_freq = 8000
+def _sine_table(samples_per_column: int, height: int = HEIGHT):
+    """Sine of every row frequency over one column's samples (cached)."""
+    import numpy as np
 
-    # Generate frequencies for each row
-    frequencies = np.linspace(min_freq, max_freq, height)
+    key = (samples_per_column, height)
+    if key not in _sine_tables:
+        frequencies = np.linspace(MIN_FREQ, MAX_FREQ, height)
+        t = np.arange(samples_per_column) / SAMPLE_RATE
+        _sine_tables[key] = np.sin(2 * np.pi * frequencies[:, None] * t[None, :])
+    return _sine_tables[key]
 
-    # Generate audio
-    audio = np.zeros(num_samples)
 
-    for col in range(width):
-        start_sample = col * samples_per_column
-        end_sample = start_sample + samples_per_column
-        t = np.arange(samples_per_column) / sample_rate
+def pixels_to_audio(pixels, duration: float):
+    """Synthesize 16-bit audio from a height x width array in 0-255 (row 0 = top)."""
+    import numpy as np
 
-        for row in range(height):
-            amplitude = pixels[row, col]
-            if amplitude > 0.1:  # Threshold to reduce noise
-                freq = frequencies[row]
-                audio[start_sample:end_sample] += amplitude * np.sin(2 * np.pi * freq * t)
+    # Flip vertically so low frequencies are at bottom, normalize to 0-1
+    pixels = np.flipud(pixels) / 255.0
+    height, width = pixels.shape
+
+    num_samples = int(duration * SAMPLE_RATE)
+    samples_per_column = num_samples // width
+
+    # Every column uses the same time base, so one matrix product covers all
+    # columns. Threshold amplitudes to reduce noise.
+    amplitudes = np.where(pixels > 0.1, pixels, 0.0)
+    columns = amplitudes.T @ _sine_table(samples_per_column, height)
+
+    audio = np.zeros(num_samples)
+    audio[:width * samples_per_column] = columns.ravel()
 
     # Normalize
-    audio = audio / np.max(np.abs(audio)) * 0.8
+    peak = np.max(np.abs(audio))
+    if peak > 0:
+        audio = audio / peak * 0.8
 
     # Convert to 16-bit
-    audio_int = (audio * 32767).astype(np.int16)
+    return (audio * 32767).astype(np.int16)
+
+
+def image_to_spectrogram_audio(image_path: str, output_path: str, duration: float = 5.0):
+    """Convert image to audio that displays the image as a spectrogram."""
+    try:
+        from PIL import Image
+        import numpy as np
+        from scipy.io import wavfile
+    except ImportError:
+        print("Error: Requires 'pillow', 'numpy', 'scipy'. Install with:")
+        print("  pip install pillow numpy scipy")
+        sys.exit(1)
+
+    # Load and prepare image: grayscale, resized to spectrogram dimensions
+    img = Image.open(image_path).convert('L')
+    img = img.resize((WIDTH, HEIGHT))
 
     # Save
-    wavfile.write(output_path, sample_rate, audio_int)
+    wavfile.write(output_path, SAMPLE_RATE, pixels_to_audio(np.array(img), duration))
     print(f"Created audio file: {output_path}")
-    print(f"Duration: {duration}s, Sample rate: {sample_rate}Hz")
+    print(f"Duration: {duration}s, Sample rate: {SAMPLE_RATE}Hz")
     print(f"View with: python spectrogram.py view {output_path}")
 
 
-def text_to_spectrogram_audio(text: str, output_path: str, duration: float = 3.0):
+def text_to_spectrogram_audio(text: str, output_path: str, duration: float = 3.0,
+                              font_path: str = None, font_size: int = 72):
     """Create audio with text visible in spectrogram."""
     try:
-        from PIL import Image, ImageDraw, ImageFont
-        import numpy as np
+        from scipy.io import wavfile
     except ImportError:
-        print("Error: Requires 'pillow', 'numpy'. Install with: pip install pillow numpy")
+        print("Error: Requires 'scipy'. Install with: pip install scipy")
         sys.exit(1)
 
-    # Create text image
-    width = 800
-    height = 256
+    pixels = get_glyph_atlas(font_path, font_size).render(text)
+    wavfile.write(output_path, SAMPLE_RATE, pixels_to_audio(pixels, duration))
+    print(f"Created audio file: {output_path}")
+    print(f"Duration: {duration}s, Sample rate: {SAMPLE_RATE}Hz")
+    print(f"View with: python spectrogram.py view {output_path}")
 
-    img = Image.new('L', (width, height), 0)
-    draw = ImageDraw.Draw(img)
 
-    # Try to use a nice font, fall back to default
-    try:
-        font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 72)
-    except:
-        try:
-            font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 72)
-        except:
-            font = ImageFont.load_default()
+def texts_to_spectrogram_audio(items, duration: float = 3.0,
+                               font_path: str = None, font_size: int = 72) -> list:
+    """Render many (text, output_path) pairs in one process.
 
-    # Calculate text position (centered)
-    bbox = draw.textbbox((0, 0), text, font=font)
-    text_width = bbox[2] - bbox[0]
-    text_height = bbox[3] - bbox[1]
-    x = (width - text_width) // 2
-    y = (height - text_height) // 2
+    The font and glyphs are loaded once and strings are rasterized straight to
+    arrays, so each message costs one synthesis pass and one WAV write.
+    """
+    try:
+        from scipy.io import wavfile
+    except ImportError:
+        print("Error: Requires 'scipy'. Install with: pip install scipy")
+        sys.exit(1)
 
-    draw.text((x, y), text, fill=255, font=font)
+    atlas = get_glyph_atlas(font_path, font_size)
+    written = []
+    for text, output_path in items:
+        wavfile.write(output_path, SAMPLE_RATE, pixels_to_audio(atlas.render(text), duration))
+        written.append(output_path)
+    return written
 
-    # Save temp image then convert
-    temp_path = "/tmp/temp_spectrogram_text.png"
-    img.save(temp_path)
 
-    image_to_spectrogram_audio(temp_path, output_path, duration)
+def _read_batch(input_path: str, output_dir: str, prefix: str) -> list:
+    """Read (text, output_path) pairs from a CSV (text[,output]) or text-per-line file."""
+    if input_path.endswith('.csv'):
+        with open(input_path, newline='', encoding='utf-8') as f:
+            rows = [(row['text'], row.get('output')) for row in csv.DictReader(f)]
+    else:
+        with open(input_path, encoding='utf-8') as f:
+            rows = [(line.rstrip('\r\n'), None) for line in f if line.strip()]
+    return [(text, os.path.join(output_dir, output or f"{prefix}{i:04d}.wav"))
+            for i, (text, output) in enumerate(rows)]
 
 
 def view_spectrogram(audio_path: str, output_path: str = None):
@@ -180,6 +310,15 @@ def main():
     txt2aud.add_argument('output', help='Output WAV file')
     txt2aud.add_argument('--duration', '-d', type=float, default=3.0, help='Duration in seconds')
 
+    # Batch text to audio
+    txtbatch = subparsers.add_parser('text-batch', help='Render many text spectrograms in one run')
+    txtbatch.add_argument('input', help="Text file (one message per line) or CSV with 'text'[,'output'] columns")
+    txtbatch.add_argument('output_dir', help='Directory for output WAV files')
+    txtbatch.add_argument('--duration', '-d', type=float, default=3.0, help='Duration in seconds')
+    txtbatch.add_argument('--prefix', default='spectrogram_', help='Output filename prefix')
+    txtbatch.add_argument('--font', help='TrueType font file')
+    txtbatch.add_argument('--font-size', type=int, default=72, help='Font size')
+
     # View spectrogram
     view = subparsers.add_parser('view', help='View/save spectrogram of audio')
     view.add_argument('audio', help='Audio file to analyze')
@@ -191,6 +330,11 @@ def main():
         image_to_spectrogram_audio(args.image, args.output, args.duration)
     elif args.command == 'text-to-audio':
         text_to_spectrogram_audio(args.text, args.output, args.duration)
+    elif args.command == 'text-batch':
+        os.makedirs(args.output_dir, exist_ok=True)
+        items = _read_batch(args.input, args.output_dir, args.prefix)
+        written = texts_to_spectrogram_audio(items, args.duration, args.font, args.font_size)
+        print(f"Created {len(written)} audio files in {args.output_dir}")
     elif args.command == 'view':
         view_spectrogram(args.audio, args.output)
     else:
@@ -11,12 +11,15 @@ Usage:
     python steganography.py unicode-extract <text>
 
 Requirements:
-    pip install pillow numpy
+    pip install pillow numpy  (LSB commands only; metadata commands use the stdlib)
 """
 
 import argparse
 import os
+import shutil
+import struct
 import sys
+import zlib
 
 def hide_in_image_lsb(image_path: str, message: str, output_path: str):
     """Hide message in image using LSB steganography."""
@@ -93,63 +96,224 @@ def extract_from_image_lsb(image_path: str) -> str:
         return str(message_bytes)
 
 
-def hide_in_metadata(file_path: str, message: str, output_path: str):
-    """Hide message in file EXIF/metadata (for images)."""
-    try:
-        from PIL import Image
-        from PIL.ExifTags import TAGS
-    except ImportError:
-        print("Error: Requires 'pillow'. Install with: pip install pillow")
-        sys.exit(1)
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+JPEG_SOI = b'\xff\xd8'
 
-    img = Image.open(file_path)
+# EXIF IFD0 ASCII tags worth reporting
+EXIF_TEXT_TAGS = {0x010E: 'ImageDescription', 0x010F: 'Make', 0x0110: 'Model',
+                  0x0131: 'Software', 0x013B: 'Artist', 0x8298: 'Copyright'}
 
-    # For JPEG/PNG, we can add to info dict
-    if img.format in ['JPEG', 'PNG']:
-        # Copy the image with metadata
-        img_copy = img.copy()
 
-        # Add comment
-        if img.format == 'PNG':
-            from PIL import PngImagePlugin
-            meta = PngImagePlugin.PngInfo()
-            meta.add_text("Comment", message)
-            img_copy.save(output_path, pnginfo=meta)
-        else:
-            # For JPEG, use EXIF comment (limited support)
-            img_copy.save(output_path)
-            print("Note: JPEG metadata hiding has limited support. Consider PNG.")
+def _copy_remaining(src, dst):
+    """Copy the rest of src into dst unchanged, using sendfile where available."""
+    dst.flush()
+    offset = src.tell()
+    if hasattr(os, 'sendfile'):
+        remaining = os.fstat(src.fileno()).st_size - offset
+        try:
+            while remaining > 0:
+                sent = os.sendfile(dst.fileno(), src.fileno(), offset, remaining)
+                if sent == 0:
+                    break
+                offset += sent
+                remaining -= sent
+        except OSError:
+            pass  # finish with buffered copy below
+        src.seek(offset)
+        dst.seek(0, os.SEEK_END)
+    shutil.copyfileobj(src, dst, 1024 * 1024)
 
-        print(f"Message hidden in metadata of {output_path}")
-    else:
-        print(f"Unsupported format: {img.format}")
 
+def _png_chunk(chunk_type: bytes, data: bytes) -> bytes:
+    """Build a PNG chunk with length and CRC."""
+    crc = zlib.crc32(chunk_type + data) & 0xFFFFFFFF
+    return struct.pack('>I', len(data)) + chunk_type + data + struct.pack('>I', crc)
 
-def extract_from_metadata(file_path: str) -> str:
-    """Extract message from file metadata."""
+
+def _png_text_chunk(keyword: str, text: str) -> bytes:
+    """tEXt chunk for Latin-1 text, iTXt (UTF-8) otherwise."""
     try:
-        from PIL import Image
-    except ImportError:
-        print("Error: Requires 'pillow'. Install with: pip install pillow")
-        sys.exit(1)
+        return _png_chunk(b'tEXt', keyword.encode('latin-1') + b'\x00' + text.encode('latin-1'))
+    except UnicodeEncodeError:
+        data = keyword.encode('latin-1') + b'\x00\x00\x00' + b'\x00\x00' + text.encode('utf-8')
+        return _png_chunk(b'iTXt', data)
+
+
+def _read_png_text(f) -> dict:
+    """Read tEXt/zTXt/iTXt chunks, seeking past all other chunk data.
+
+    The first chunk for a keyword wins, matching where hide_in_metadata inserts.
+    """
+    texts = {}
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            break
+        length, chunk_type = struct.unpack('>I4s', header)
+        if chunk_type in (b'tEXt', b'zTXt', b'iTXt'):
+            data = f.read(length)
+            keyword, _, rest = data.partition(b'\x00')
+            keyword = keyword.decode('latin-1')
+            if chunk_type == b'tEXt':
+                value = rest.decode('latin-1')
+            elif chunk_type == b'zTXt':
+                value = zlib.decompress(rest[1:]).decode('latin-1')
+            else:
+                compressed = rest[0]
+                _, _, rest = rest[2:].partition(b'\x00')  # language tag
+                _, _, rest = rest.partition(b'\x00')      # translated keyword
+                value = (zlib.decompress(rest) if compressed else rest).decode('utf-8')
+            texts.setdefault(keyword, value)
+            f.seek(4, os.SEEK_CUR)  # CRC
+        elif chunk_type == b'IEND':
+            break
+        else:
+            f.seek(length + 4, os.SEEK_CUR)
+    return texts
+
+
+def _read_jpeg_segment(f):
+    """Read the next JPEG marker. Returns (marker, payload) or (None, None)."""
+    byte = f.read(1)
+    if byte != b'\xff':
+        return None, None
+    while byte == b'\xff':  # skip fill bytes
+        byte = f.read(1)
+    if not byte:
+        return None, None
+    marker = byte[0]
+    if marker == 0xDA or marker == 0xD9:  # SOS / EOI: header segments end here
+        return marker, b''
+    return marker, _read_jpeg_payload(f)
+
+
+def _read_jpeg_payload(f) -> bytes:
+    """Read a segment's length field and payload, rejecting corrupt lengths.
+
+    Raises struct.error if the file is truncated or the length is below 2
+    (which would otherwise turn into read(-1) and swallow the whole file).
+    """
+    length = struct.unpack('>H', f.read(2))[0]
+    if length < 2:
+        raise struct.error(f"invalid JPEG segment length {length}")
+    payload = f.read(length - 2)
+    if len(payload) < length - 2:
+        raise struct.error("truncated JPEG segment")
+    return payload
+
+
+def _parse_exif_text(payload: bytes) -> dict:
+    """Read ASCII tags from IFD0 of an APP1 Exif payload."""
+    tiff = payload[6:]
+    if len(tiff) < 8 or tiff[:2] not in (b'II', b'MM'):
+        return {}
+    endian = '<' if tiff[:2] == b'II' else '>'
+    tags = {}
+    try:
+        ifd_offset = struct.unpack(endian + 'I', tiff[4:8])[0]
+        count = struct.unpack(endian + 'H', tiff[ifd_offset:ifd_offset + 2])[0]
+        for i in range(count):
+            entry = tiff[ifd_offset + 2 + 12 * i:ifd_offset + 14 + 12 * i]
+            tag, type_, n = struct.unpack(endian + 'HHI', entry[:8])
+            if tag not in EXIF_TEXT_TAGS or type_ != 2:
+                continue
+            if n <= 4:
+                raw = entry[8:8 + n]
+            else:
+                offset = struct.unpack(endian + 'I', entry[8:12])[0]
+                raw = tiff[offset:offset + n]
+            tags[EXIF_TEXT_TAGS[tag]] = raw.rstrip(b'\x00').decode('utf-8', 'replace')
+    except struct.error:
+        pass  # truncated IFD: keep what was read
+    return tags
 
-    img = Image.open(file_path)
 
-    # Check PNG text chunks
-    if 'Comment' in img.info:
-        return img.info['Comment']
+def hide_in_metadata(file_path: str, message: str, output_path: str):
+    """Hide message in PNG text chunks or JPEG COM segments without re-encoding."""
+    tmp_path = output_path + '.tmp'
+    with open(file_path, 'rb') as src:
+        try:
+            magic = src.read(8)
+            if magic == PNG_SIGNATURE:
+                # Insert a Comment chunk right after IHDR
+                ihdr_length = struct.unpack('>I', src.read(4))[0]
+                src.seek(8)
+                header = src.read(8 + ihdr_length + 4)
+                inserted = _png_text_chunk('Comment', message)
+                prefix = PNG_SIGNATURE + header
+            elif magic[:2] == JPEG_SOI:
+                # Insert a COM segment after the leading APPn segments (JFIF/EXIF stay first)
+                data = message.encode('utf-8')
+                if len(data) > 65533:
+                    print(f"Error: Message too large for a JPEG comment. Max 65533 bytes, got {len(data)}")
+                    sys.exit(1)
+                src.seek(2)
+                prefix = bytearray(JPEG_SOI)
+                while True:
+                    pos = src.tell()
+                    marker = src.read(2)
+                    if len(marker) < 2 or marker[0] != 0xFF or not 0xE0 <= marker[1] <= 0xEF:
+                        src.seek(pos)
+                        break
+                    payload = _read_jpeg_payload(src)
+                    prefix += marker + struct.pack('>H', len(payload) + 2) + payload
+                inserted = b'\xff\xfe' + struct.pack('>H', len(data) + 2) + data
+            else:
+                print(f"Unsupported format: {file_path} (PNG and JPEG only)")
+                return
+        except struct.error:
+            print(f"Error: {file_path} is truncated or corrupt")
+            sys.exit(1)
+
+        # Never leave a partial <output>.tmp behind (full disk, I/O error, ^C)
+        try:
+            with open(tmp_path, 'wb') as dst:
+                dst.write(prefix)
+                dst.write(inserted)
+                _copy_remaining(src, dst)
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    print(f"Message hidden in metadata of {output_path}")
 
-    # Check all info
-    for key, value in img.info.items():
-        if isinstance(value, str) and len(value) > 0:
-            print(f"{key}: {value}")
 
-    # Check EXIF
-    if hasattr(img, '_getexif') and img._getexif():
-        exif = img._getexif()
-        for tag_id, value in exif.items():
-            tag = TAGS.get(tag_id, tag_id)
-            print(f"EXIF {tag}: {value}")
+def extract_from_metadata(file_path: str) -> str:
+    """Extract message from PNG text chunks or JPEG COM/EXIF header segments."""
+    with open(file_path, 'rb') as f:
+        magic = f.read(8)
+        if magic == PNG_SIGNATURE:
+            texts = _read_png_text(f)
+            exif = {}
+        elif magic[:2] == JPEG_SOI:
+            f.seek(2)
+            texts, exif = {}, {}
+            try:
+                while True:
+                    marker, payload = _read_jpeg_segment(f)
+                    if marker is None or marker in (0xDA, 0xD9):
+                        break
+                    if marker == 0xFE:
+                        texts.setdefault('Comment', payload.decode('utf-8', 'replace'))
+                    elif marker == 0xE1 and payload.startswith(b'Exif\x00\x00'):
+                        exif.update(_parse_exif_text(payload))
+            except struct.error:
+                print(f"Error: {file_path} is truncated or corrupt")
+                sys.exit(1)
+        else:
+            print(f"Unsupported format: {file_path} (PNG and JPEG only)")
+            return ""
+
+    if 'Comment' in texts:
+        return texts['Comment']
+
+    # Report other text fields
+    for key, value in texts.items():
+        if value:
+            print(f"{key}: {value}")
+    for tag, value in exif.items():
+        print(f"EXIF {tag}: {value}")
 
     return ""
 